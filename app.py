@@ -1,12 +1,18 @@
+import codecs
 import io
 import os
 import csv
 import json
 import re
+import unicodedata
+from collections import namedtuple
 from datetime import datetime
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
+import numpy as np
 import pandas as pd
 
 try:
@@ -21,7 +27,21 @@ try:
 except Exception:
     _cors_available = False
 
+try:
+    import pyarrow as pa  # optional, faster CSV parsing
+    import pyarrow.csv as pacsv
+    _pyarrow_available = True
+except Exception:
+    _pyarrow_available = False
+
+try:
+    import orjson  # optional, faster JSON responses
+    _orjson_available = True
+except Exception:
+    _orjson_available = False
+
 app = Flask(__name__)
+app.json.compact = True
 if _cors_available:
     CORS(app)
 
@@ -49,170 +69,374 @@ PART_NUMBER_FALLBACKS: List[str] = _cfg.get("part_number_fallbacks", [
     "Part Number","Supplier Part Number","Barcode","SKU","Code"
 ])
 
+# Frozen views of the config for the build/validate hot paths; template
+# frames always carry exactly TEMPLATE_COLUMNS, so filter against it once
+_DEFAULT_FILLS: Tuple[Tuple[str, str], ...] = tuple(
+    (col, val) for col, val in DEFAULTS.items() if col in TEMPLATE_COLUMNS
+)
+_PART_NUMBER_SOURCES: Tuple[str, ...] = tuple(c for c in PART_NUMBER_FALLBACKS if c in TEMPLATE_COLUMNS)
+_CURRENCY_COLUMNS: Tuple[str, ...] = tuple(c for c in ("Cost ex Tax", "Sell ex Tax") if c in TEMPLATE_COLUMNS)
+_REQUIRED_NONEMPTY: Tuple[str, ...] = tuple(c for c in REQUIRED_NONEMPTY if c in TEMPLATE_COLUMNS)
+_REQUIRED_NUMERIC: Tuple[str, ...] = tuple(c for c in REQUIRED_NUMERIC if c in TEMPLATE_COLUMNS)
+_ALLOWED_TAX_SET = frozenset(ALLOWED_TAX)
+_DEFAULT_TAX: str = DEFAULTS.get("Tax Code", "")
+_TAX_ERROR = f"Must be one of {ALLOWED_TAX}"
+
+# Header row of the template CSV, as pandas writes it
+_TEMPLATE_HEADER_CSV = pd.DataFrame(columns=TEMPLATE_COLUMNS).to_csv(index=False)
+
+# Rows per slice when streaming the template CSV back to the client
+CSV_CHUNK_ROWS = 50_000
+
 # -------- Helpers --------
 _BOM = "\ufeff"
+# Arrow-backed strings keep cell text contiguous (no PyObject per cell) and run
+# .str methods in Arrow's C++ kernels; plain object strings without pyarrow
+_STR_DTYPE = pd.StringDtype("pyarrow") if _pyarrow_available else str
 
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+_SEPARATORS = str.maketrans({"-": " ", "_": " "})
+
+@lru_cache(maxsize=512)
 def norm_header(s: str) -> str:
     s = (s or "").replace(_BOM, "")
     s = s.strip().lower()
-    s = s.replace("-", " ").replace("_", " ")
-    s = re.sub(r"[^\w\s]", " ", s)   # remove punctuation
-    s = re.sub(r"\s+", " ", s)       # collapse spaces
+    s = s.translate(_SEPARATORS)
+    s = _PUNCT_RE.sub(" ", s)   # remove punctuation
+    s = _SPACE_RE.sub(" ", s)   # collapse spaces
     return s
 
+# Normalized lookups for header matching; config is fixed after load
+_TEMPLATE_NORM: Dict[str, str] = {norm_header(t): t for t in TEMPLATE_COLUMNS}
+_ALIAS_NORM: Dict[str, str] = {norm_header(k): v for k, v in ALIASES.items()}
+
+def _build_token_index() -> Dict[str, List[str]]:
+    # token -> template columns whose normalized name contains it, in template order
+    index: Dict[str, List[str]] = {}
+    for t in TEMPLATE_COLUMNS:
+        for tok in dict.fromkeys(norm_header(t).split()):
+            index.setdefault(tok, []).append(t)
+    return index
+
+_TOKEN_INDEX: Dict[str, List[str]] = _build_token_index()
+_TEMPLATE_POS: Dict[str, int] = {t: i for i, t in enumerate(TEMPLATE_COLUMNS)}
+# template column -> (normalized name, number of distinct tokens)
+_TEMPLATE_TOKENS: Dict[str, Tuple[str, int]] = {
+    t: (norm_header(t), len(set(norm_header(t).split()))) for t in TEMPLATE_COLUMNS
+}
+
+def ends_inside_quote(stream, last_cell: str, encoding=None) -> bool:
+    # pyarrow accepts a file that ends inside an open quoted field (that field
+    # swallows the rest of the file, rows and all); pandas rejects it. Such a
+    # field is always the last cell parsed, and the raw file then ends with a
+    # quote opening a field followed by the cell's escaped text.
+    codec = "utf-8" if encoding in (None, "utf-8-sig") else encoding  # no BOM in the tail
+    tail = ('"' + last_cell.replace('"', '""')).encode(codec)
+    size = stream.seek(0, io.SEEK_END)
+    start = max(size - len(tail) - 1, 0)
+    stream.seek(start)
+    raw = stream.read()
+    if not raw.endswith(tail):
+        return False
+    before = raw[:-len(tail)]
+    return (before == b"" and start == 0) or before[-1:] in (b",", b"\n", b"\r")
+
+def read_csv_stream(stream, encoding=None) -> pd.DataFrame:
+    # Use pyarrow's multithreaded parser when available. Every column is read
+    # as text (pandas' engine="pyarrow" infers types first, turning "00123"
+    # into 123 and "4" into "4.0"), so the header is probed to name them.
+    if _pyarrow_available:
+        try:
+            read_opts = pacsv.ReadOptions(encoding=encoding or "utf8")
+            stream.seek(0)
+            names = pacsv.open_csv(stream, read_options=read_opts).schema.names
+            # Repeated headers are left to pandas, which de-duplicates them.
+            # So are single-column files: pyarrow keeps whitespace-only lines
+            # as rows there, where pandas skips them as blank lines.
+            if len(names) > 1 and len(set(names)) == len(names):
+                convert_opts = pacsv.ConvertOptions(
+                    column_types={n: pa.string() for n in names},
+                    null_values=[],
+                    strings_can_be_null=False,
+                    quoted_strings_can_be_null=False,
+                )
+                stream.seek(0)
+                table = pacsv.read_csv(stream, read_options=read_opts, convert_options=convert_opts)
+                last_cell = table.column(len(names) - 1)[-1].as_py() if table.num_rows else names[-1]
+                # A file ending inside an open quote is left to pandas, which rejects it
+                if not ends_inside_quote(stream, last_cell, encoding):
+                    df = table.to_pandas(types_mapper={pa.string(): _STR_DTYPE}.get)
+                    # Blank header cells get pandas' placeholder names
+                    df.columns = [n if n else f"Unnamed: {i}" for i, n in enumerate(names)]
+                    return df
+        except Exception:
+            pass
+    stream.seek(0)
+    return pd.read_csv(stream, dtype=str, keep_default_na=False, encoding=encoding)
+
+def sniff_csv_encoding(stream) -> Optional[str]:
+    # Strict UTF-8 check on the first 64 KB (None = pandas' UTF-8 default).
+    # Anything else goes straight to latin-1, the loop's catch-all, instead of
+    # failing full UTF-8 parses first.
+    sample = stream.read(65536)
+    stream.seek(0)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return None
+    except UnicodeDecodeError:
+        return "latin-1"
+
+def read_excel_stream(stream, fallback_engine: str) -> pd.DataFrame:
+    # calamine (Rust) parses workbooks much faster and with far less memory
+    # than openpyxl/xlrd; use it when python-calamine is installed
+    try:
+        return pd.read_excel(stream, dtype=str, engine="calamine")
+    except ImportError:
+        stream.seek(0)
+        return pd.read_excel(stream, dtype=str, engine=fallback_engine)
+
 def read_dataframe_from_upload(file_storage) -> pd.DataFrame:
     filename = (file_storage.filename or "").strip()
-    data = file_storage.read()
-    if not data:
+    # Parse straight from Werkzeug's (possibly disk-spooled) upload stream
+    # rather than copying the whole file into memory first
+    stream = file_storage.stream
+    try:
+        stream.seek(0, io.SEEK_END)
+    except (AttributeError, OSError):
+        stream = io.BytesIO(file_storage.read())
+        stream.seek(0, io.SEEK_END)
+    if stream.tell() == 0:
         raise ValueError("Uploaded file is empty.")
+    stream.seek(0)
     if filename.lower().endswith(".xls"):
-        # For legacy .xls, use xlrd engine
-        df = pd.read_excel(io.BytesIO(data), dtype=str, engine="xlrd")
+        # For legacy .xls, fall back to xlrd engine
+        df = read_excel_stream(stream, "xlrd")
     elif filename.lower().endswith((".xlsx", ".xlsm")):
-        df = pd.read_excel(io.BytesIO(data), dtype=str)  # openpyxl default
+        df = read_excel_stream(stream, "openpyxl")
     else:
-        # CSVs can have BOM or odd encodings; try a few
-        for enc in (None, "utf-8-sig", "latin-1"):
+        # CSVs can have BOM or odd encodings; start with the sniffed one so the
+        # file is normally parsed once, then try a few
+        for enc in dict.fromkeys((sniff_csv_encoding(stream), None, "utf-8-sig", "latin-1")):
             try:
-                df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, encoding=enc)
+                df = read_csv_stream(stream, enc)
                 break
             except Exception:
                 continue
         else:
-            df = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, errors="ignore")
-    # Ensure strings + strip
-    df = df.applymap(lambda x: str(x).strip())
+            stream.seek(0)
+            df = pd.read_csv(stream, dtype=str, keep_default_na=False, errors="ignore")
+    # Ensure strings (Excel blanks arrive as NaN) + strip, one column at a time
+    df = df.fillna("").astype(_STR_DTYPE)
+    for col in df.columns:
+        df[col] = df[col].str.strip()
     # Strip BOM from column names too
-    df.columns = [c.replace(_BOM, "").strip() for c in df.columns]
+    df.columns = df.columns.astype(str).str.replace(_BOM, "", regex=False).str.strip()
     return df
 
 def auto_map_headers(cols: List[str]) -> Tuple[Dict[str, str], List[str]]:
     mapping: Dict[str, str] = {}
     used_targets = set()
 
-    # Precompute normalized lookups
-    template_norm = {norm_header(t): t for t in TEMPLATE_COLUMNS}
-    alias_norm = {norm_header(k): v for k, v in ALIASES.items()}
+    # Normalize each header once for all passes
+    normed = [(c, norm_header(c)) for c in cols]
 
-    # 1) exact by normalized equality to template
-    for c in cols:
-        nc = norm_header(c)
-        t = template_norm.get(nc)
-        if t and t not in used_targets:
-            mapping[c] = t
-            used_targets.add(t)
+    # 1) exact by normalized equality to template, then 2) alias matches;
+    # each is a single dict lookup per header
+    for lookup in (_TEMPLATE_NORM, _ALIAS_NORM):
+        for c, nc in normed:
+            if c in mapping:
+                continue
+            t = lookup.get(nc)
+            if t and t not in used_targets:
+                mapping[c] = t
+                used_targets.add(t)
 
-    # 2) alias matches
-    for c in cols:
-        if c in mapping:
-            continue
-        nc = norm_header(c)
-        t = alias_norm.get(nc)
-        if t and t not in used_targets:
-            mapping[c] = t
-            used_targets.add(t)
-
-    # 3) fuzzy partial contains
-    for c in cols:
+    # 3) fuzzy: all tokens of the header appear in a template name, or vice versa
+    for c, nc in normed:
         if c in mapping:
             continue
-        nc = norm_header(c)
-        for tn_norm, t_actual in template_norm.items():
-            if tn_norm in nc or nc in tn_norm:
-                if t_actual not in used_targets:
-                    mapping[c] = t_actual
-                    used_targets.add(t_actual)
+        tokens = set(nc.split())
+        overlap: Dict[str, int] = {}
+        for tok in tokens:
+            for t in _TOKEN_INDEX.get(tok, ()):
+                if t not in used_targets:
+                    overlap[t] = overlap.get(t, 0) + 1
+        best, best_key = None, None
+        for t in sorted(overlap, key=_TEMPLATE_POS.__getitem__):
+            n = overlap[t]
+            t_norm, t_count = _TEMPLATE_TOKENS[t]
+            if n < len(tokens) and n < t_count:
+                continue
+            # Highest Jaccard wins; ties go to the longest common prefix, then template order
+            key = (n / (len(tokens) + t_count - n), len(os.path.commonprefix([nc, t_norm])))
+            if best_key is None or key > best_key:
+                best, best_key = t, key
+        if best is None:
+            # No whole-word match (e.g. "Barcodes", "Notes1"): fall back to
+            # substring containment either way, first template in order
+            for tn_norm, t_actual in _TEMPLATE_NORM.items():
+                if (tn_norm in nc or nc in tn_norm) and t_actual not in used_targets:
+                    best = t_actual
                     break
+        if best:
+            mapping[c] = best
+            used_targets.add(best)
 
     missing_targets = [t for t in TEMPLATE_COLUMNS if t not in used_targets]
     return mapping, missing_targets
 
-def clean_currency_str(s: str) -> str:
-    return (s or "").replace(",", "").replace("$", "").strip()
+def clean_currency(s: pd.Series) -> pd.Series:
+    return s.str.replace(r"[,$]", "", regex=True).str.strip()
 
-def to_numeric_or_none(s: str):
-    s2 = clean_currency_str(s)
-    s2 = "".join(ch for ch in s2 if (ch.isdigit() or ch in ".-"))
-    if s2 in ("", ".", "-", "-.", ".-"):
-        return None
+def _parse_numeric_cell(v: str) -> float:
+    # float() reads any Unicode decimal digits ("١٢", "１２"); keep what it
+    # would see after dropping everything but digits, "." and "-"
     try:
-        return float(s2)
-    except Exception:
-        return None
-
-def first_nonempty(*vals: str) -> str:
-    for v in vals:
-        if str(v).strip():
-            return str(v).strip()
-    return ""
-
-def build_template_frame(df: pd.DataFrame) -> pd.DataFrame:
+        return float("".join(ch for ch in v if ch.isdigit() or ch in ".-"))
+    except ValueError:
+        return np.nan
+
+def to_numeric_series(s: pd.Series) -> pd.Series:
+    # Keep only digits, "." and "-" (which also drops "," "$" and spaces) then
+    # parse; anything unparseable becomes NaN
+    parsed = pd.to_numeric(s.str.replace(r"[^0-9.\-]", "", regex=True), errors="coerce").astype(float)
+    # The regex/to_numeric path only understands ASCII digits; the rare
+    # non-ASCII cells are parsed one by one as before
+    non_ascii = s.str.contains(r"[^\x00-\x7f]", regex=True).to_numpy(dtype=bool)
+    if non_ascii.any():
+        parsed[non_ascii] = [_parse_numeric_cell(v) for v in s[non_ascii]]
+    return parsed
+
+def build_template_frame(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, pd.Series]]:
     mapping, _missing = auto_map_headers(list(df.columns))
 
-    # Always create output with the SAME NUMBER OF ROWS as input
-    out = pd.DataFrame(index=range(len(df)))
-    for col in TEMPLATE_COLUMNS:
-        out[col] = ""
-
-    # Copy mapped columns across
-    for src, tgt in mapping.items():
-        out[tgt] = df[src].values
+    # Select + rename mapped columns in one block operation, then lay them out
+    # in template order (unmapped template columns come out blank). Keeps the
+    # SAME NUMBER OF ROWS as input.
+    out = df.loc[:, list(mapping)].rename(columns=mapping)
+    out = out.reindex(columns=TEMPLATE_COLUMNS, fill_value="").astype(_STR_DTYPE)
 
     # Autofill Part Number if blank using fallbacks (in order)
     if "Part Number" in out.columns:
-        candidates = [c for c in PART_NUMBER_FALLBACKS if c in out.columns]
+        candidates = _PART_NUMBER_SOURCES
         if candidates:
-            for i in range(len(out)):
-                if str(out.at[i, "Part Number"]).strip() == "":
-                    # take first non-empty from candidates for this row
-                    out.at[i, "Part Number"] = first_nonempty(*[out.at[i, c] for c in candidates if c in out.columns])
+            blank = out["Part Number"].str.strip().eq("")
+            if blank.any():
+                # first non-empty candidate per row
+                fill = pd.Series("", index=out.index, dtype=object)
+                for c in candidates:
+                    v = out[c].str.strip()
+                    fill = fill.mask(fill.eq("") & v.ne(""), v)
+                out["Part Number"] = out["Part Number"].mask(blank, fill)
 
     # Apply defaults (only where empty)
-    for col, val in DEFAULTS.items():
-        if col in out.columns:
-            out[col] = out[col].where(out[col].astype(str).str.strip() != "", val)
+    for col, val in _DEFAULT_FILLS:
+        out[col] = out[col].mask(out[col].str.strip().eq(""), val)
 
     # Clean numeric-looking fields
-    for col in ["Cost ex Tax", "Sell ex Tax"]:
-        if col in out.columns:
-            out[col] = out[col].astype(str).map(clean_currency_str)
-
-    # Final column order
-    out = out[TEMPLATE_COLUMNS]
-
-    return out
-
-def validate_frame(out: pd.DataFrame) -> List[Dict]:
-    errors: List[Dict] = []
-    n = len(out)
-    for i in range(n):
-        rownum = i + 2  # 1-based with header row
-        for col in REQUIRED_NONEMPTY:
-            if col in out.columns and str(out.at[i, col]).strip() == "":
-                errors.append({"row": rownum, "field": col, "error": "Required"})
-        for col in REQUIRED_NUMERIC:
-            if col in out.columns:
-                val = to_numeric_or_none(str(out.at[i, col]))
-                if val is None and str(out.at[i, col]).strip() != "":
-                    errors.append({"row": rownum, "field": col, "error": "Must be numeric ex tax"})
-        if "Tax Code" in out.columns:
-            tc = str(out.at[i, "Tax Code"]).strip().upper() or DEFAULTS.get("Tax Code","")
-            if tc and tc not in ALLOWED_TAX:
-                errors.append({"row": rownum, "field": "Tax Code", "error": f"Must be one of {ALLOWED_TAX}"})
-    return errors
-
-def errors_to_csv_bytes(errs: List[Dict]) -> io.BytesIO:
-    sio = io.StringIO()
-    w = csv.DictWriter(sio, fieldnames=["row","field","error"])
-    w.writeheader()
-    for e in errs:
-        w.writerow(e)
-    return io.BytesIO(sio.getvalue().encode("utf-8-sig"))
+    for col in _CURRENCY_COLUMNS:
+        out[col] = clean_currency(out[col])
+
+    # Parse required numeric columns once; validate_frame reuses the result
+    numeric = {col: to_numeric_series(out[col]) for col in _REQUIRED_NUMERIC}
+
+    return out, numeric
+
+# Validation errors as parallel arrays: CSV row numbers (1-based, header is
+# row 1), field names and messages, in row-major order
+Errors = namedtuple("Errors", "rows fields msgs")
+
+def validate_frame(out: pd.DataFrame, numeric: Optional[Dict[str, pd.Series]] = None) -> Errors:
+    # Collect flagged row numbers per check, then restore row-major order
+    rows: List[np.ndarray] = []
+    fields: List[np.ndarray] = []
+    msgs: List[np.ndarray] = []
+
+    def flag(mask: pd.Series, col: str, msg: str) -> None:
+        r = np.flatnonzero(mask.to_numpy(dtype=bool)) + 2  # 1-based with header row
+        rows.append(r)
+        fields.append(np.full(len(r), col, dtype=object))
+        msgs.append(np.full(len(r), msg, dtype=object))
+
+    # build_template_frame guarantees all-string columns, so no per-cell str()
+    for col in _REQUIRED_NONEMPTY:
+        flag(out[col].str.strip().eq(""), col, "Required")
+    numeric = numeric or {}
+    for col in _REQUIRED_NUMERIC:
+        s = out[col]
+        parsed = numeric[col] if col in numeric else to_numeric_series(s)
+        flag(parsed.isna() & s.str.strip().ne(""), col, "Must be numeric ex tax")
+    if "Tax Code" in out.columns:
+        tc = out["Tax Code"].str.strip().str.upper()
+        tc = tc.mask(tc.eq(""), _DEFAULT_TAX)
+        flag(tc.ne("") & ~tc.isin(_ALLOWED_TAX_SET), "Tax Code", _TAX_ERROR)
+
+    if not rows:
+        return Errors(np.empty(0, dtype=np.intp), np.empty(0, dtype=object), np.empty(0, dtype=object))
+    all_rows = np.concatenate(rows)
+    order = np.argsort(all_rows, kind="stable")  # stable: keeps per-row field order
+    return Errors(all_rows[order], np.concatenate(fields)[order], np.concatenate(msgs)[order])
+
+def errors_to_csv_bytes(errs: Errors) -> io.BytesIO:
+    # Encode straight into the byte buffer instead of building the text first
+    buf = io.BytesIO()
+    tw = io.TextIOWrapper(buf, encoding="utf-8-sig", newline="", write_through=True)
+    w = csv.writer(tw)
+    w.writerow(("row", "field", "error"))
+    w.writerows(zip(errs.rows.tolist(), errs.fields, errs.msgs))
+    tw.detach()  # keep buf open once the wrapper is gone
+    buf.seek(0)
+    return buf
+
+def iter_template_csv(out: pd.DataFrame) -> Iterator[bytes]:
+    # Stream the template in row slices so the full CSV text is never held in
+    # memory. Slices go through pyarrow's C++ writer when available; it only
+    # matches pandas' output unquoted, so a slice holding a delimiter, quote or
+    # line break is left to pandas' writer instead.
+    yield _BOM.encode("utf-8")
+    yield _TEMPLATE_HEADER_CSV.encode("utf-8")
+    if _pyarrow_available:
+        arrow_opts = pacsv.WriteOptions(include_header=False, quoting_style="none")
+    for start in range(0, len(out), CSV_CHUNK_ROWS):
+        chunk = out.iloc[start:start + CSV_CHUNK_ROWS]
+        if _pyarrow_available:
+            try:
+                sink = pa.BufferOutputStream()
+                pacsv.write_csv(pa.Table.from_pandas(chunk, preserve_index=False), sink, write_options=arrow_opts)
+                yield sink.getvalue().to_pybytes()
+                continue
+            except pa.ArrowException:
+                pass
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+def make_csv_download(chunks, download_name: str) -> Response:
+    # Streamed CSV attachment with the same headers send_file(as_attachment=True)
+    # sets: Cache-Control: no-cache and a Content-Disposition that uses the
+    # RFC 2231 form for non-ASCII names
+    resp = Response(chunks, mimetype="text/csv")
+    resp.cache_control.no_cache = True
+    try:
+        download_name.encode("ascii")
+        names = {"filename": download_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": f"UTF-8''{quote(download_name, safe='!#$&+-.^_`|~')}"}
+    resp.headers.set("Content-Disposition", "attachment", **names)
+    return resp
+
+def json_response(payload: Dict, status: int = 200) -> Response:
+    if _orjson_available:
+        return app.response_class(orjson.dumps(payload, option=orjson.OPT_SORT_KEYS),
+                                  status=status, mimetype="application/json")
+    resp = jsonify(payload)
+    resp.status_code = status
+    return resp
 
 # -------- Routes --------
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({
+    return json_response({
         "ok": True,
         "service": "simPRO Imports Backend",
         "version": "2.2.0",
@@ -224,15 +448,24 @@ def health():
 @app.route("/process", methods=["POST"])
 def process():
     if "file" not in request.files:
-        return jsonify({"ok": False, "error": "No file uploaded. Use form field 'file'."}), 400
+        return json_response({"ok": False, "error": "No file uploaded. Use form field 'file'."}, 400)
     try:
         df = read_dataframe_from_upload(request.files["file"])
-        out = build_template_frame(df)
-        errs = validate_frame(out)
-
         base = os.path.splitext(request.files["file"].filename or "input")[0]
 
-        if errs:
+        if len(df) == 0:
+            # Header-only upload: nothing to map or validate, send the blank template
+            return send_file(
+                io.BytesIO((_BOM + _TEMPLATE_HEADER_CSV).encode("utf-8")),
+                mimetype="text/csv",
+                as_attachment=True,
+                download_name=f"{base}_simpro_template.csv",
+            )
+
+        out, numeric = build_template_frame(df)
+        errs = validate_frame(out, numeric)
+
+        if len(errs.rows):
             csv_err = errors_to_csv_bytes(errs)
             return send_file(
                 csv_err,
@@ -241,17 +474,9 @@ def process():
                 download_name=f"{base}_errors.csv",
             )
 
-        csv_buf = io.StringIO()
-        out.to_csv(csv_buf, index=False)
-        csv_bytes = io.BytesIO(csv_buf.getvalue().encode("utf-8-sig"))
-        return send_file(
-            csv_bytes,
-            mimetype="text/csv",
-            as_attachment=True,
-            download_name=f"{base}_simpro_template.csv",
-        )
+        return make_csv_download(iter_template_csv(out), f"{base}_simpro_template.csv")
     except Exception as e:
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return json_response({"ok": False, "error": str(e)}, 500)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "8000")), debug=True)
@@ -0,0 +1,11 @@
+import multiprocessing
+import os
+
+# One process per core (override with WEB_CONCURRENCY on small containers);
+# pandas releases the GIL in its parsers and string kernels, so a couple of
+# threads per worker also overlap concurrent uploads.
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+threads = int(os.environ.get("GUNICORN_THREADS", "2"))
+worker_class = "gthread"
+preload_app = True
@@ -0,0 +1,6 @@
+# WSGI entry point for gunicorn (see gunicorn.conf.py). Importing app loads the
+# config and builds the header lookups once; with preload_app they are shared
+# copy-on-write across workers.
+from app import app
+
+__all__ = ["app"]